@@ -6,14 +6,17 @@ services by (host, user, dir), validates all have a host, and emits
 a JSON array of host groups to stdout.
 """
 
-import json
 import os
 import sys
+from collections import defaultdict
 
 import yaml
 
+from flow_deploy import jsonio
 from flow_deploy.config import parse_services
 
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def _env_overrides() -> dict[str, str]:
     """Read optional HOST_NAME / HOST_USER env-var overrides."""
@@ -51,26 +54,22 @@ def discover_hosts(compose_dict: dict, overrides: dict[str, str] | None = None)
         )
         sys.exit(1)
 
-    groups: dict[tuple, dict] = {}
+    # Insertion order keeps groups in deploy order (by each group's first service)
+    groups: defaultdict[tuple, list[str]] = defaultdict(list)
     for svc in app_services:
-        key = (svc.host, svc.user, svc.dir)
-        if key not in groups:
-            groups[key] = {
-                "host": svc.host,
-                "user": svc.user,
-                "dir": svc.dir,
-                "services": [],
-            }
-        groups[key]["services"].append(svc.name)
+        groups[(svc.host, svc.user, svc.dir)].append(svc.name)
 
-    return list(groups.values())
+    return [
+        {"host": host, "user": user, "dir": dir_, "services": names}
+        for (host, user, dir_), names in groups.items()
+    ]
 
 
 def main():
-    compose_dict = yaml.safe_load(sys.stdin)
+    compose_dict = yaml.load(sys.stdin, Loader=_YamlLoader)
     overrides = _env_overrides()
     hosts = discover_hosts(compose_dict, overrides)
-    json.dump(hosts, sys.stdout)
+    sys.stdout.buffer.write(jsonio.dumps(hosts))
 
 
 if __name__ == "__main__":
@@ -52,14 +52,20 @@ def status():
     log.info(f"Current tag: {current or '(none)'}")
     log.info("")
 
-    for svc in all_services:
-        ctrs = containers.get_containers_for_service(svc.name)
+    svc_containers = [
+        (svc, containers.get_containers_for_service(svc.name)) for svc in all_services
+    ]
+    health_by_id = containers.get_container_health_batch(
+        [c["ID"] for _, ctrs in svc_containers for c in ctrs if c.get("ID")]
+    )
+
+    for svc, ctrs in svc_containers:
         if ctrs:
             for c in ctrs:
                 cid = c.get("ID", "?")[:12]
                 image = c.get("Image", "?")
                 state = c.get("State", "?")
-                health = containers.get_container_health(c.get("ID", ""))
+                health = health_by_id.get(c.get("ID", ""))
                 log.info(f"  {svc.name} ({svc.role})  {cid}  {image}  {state}/{health or 'none'}")
         else:
             log.info(f"  {svc.name} ({svc.role})  no containers")
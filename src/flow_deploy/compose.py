@@ -1,16 +1,32 @@
 """Compose command resolution + execution."""
 
+import functools
+import glob
 import os
 
 import yaml
 
 from flow_deploy import process
 
+# libyaml's C loader is ~10x faster; fall back to the pure-Python one if unavailable
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
+_COMPOSE_FILE_PATTERNS = (
+    "docker-compose*.yml",
+    "docker-compose*.yaml",
+    "compose*.yml",
+    "compose*.yaml",
+)
+
+_CONFIG_CACHE: dict[tuple, dict] = {}
+
+
+@functools.lru_cache(maxsize=1)
 def resolve_command() -> list[str]:
     """Resolve the compose command to use.
 
     Order: COMPOSE_COMMAND env → script/prod (if executable) → docker compose.
+    Resolved once per process; callers must not mutate the returned list.
     """
     env_cmd = os.environ.get("COMPOSE_COMMAND")
     if env_cmd:
@@ -32,10 +48,53 @@ def compose_run(
     return process.run(command + args, env=env)
 
 
+def _compose_files() -> list[str]:
+    """List the files that can affect `<compose-cmd> config` output in the cwd."""
+    files = set()
+    for pattern in _COMPOSE_FILE_PATTERNS:
+        files.update(glob.glob(pattern))
+    compose_file = os.environ.get("COMPOSE_FILE", "")
+    if compose_file:
+        files.update(compose_file.split(os.environ.get("COMPOSE_PATH_SEPARATOR", os.pathsep)))
+    files.add(".env")
+    return sorted(files)
+
+
+def _config_cache_key(command: list[str]) -> tuple:
+    """Build a cache key from the command, cwd, and compose file mtimes."""
+    stamps = []
+    for path in _compose_files():
+        try:
+            stamps.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            continue
+    return (
+        tuple(command),
+        os.getcwd(),
+        os.environ.get("COMPOSE_FILE", ""),
+        tuple(stamps),
+    )
+
+
+def clear_config_cache() -> None:
+    """Forget all cached compose config results."""
+    _CONFIG_CACHE.clear()
+
+
 def compose_config(cmd: list[str] | None = None) -> dict:
-    """Run <compose-cmd> config and parse YAML output."""
+    """Run <compose-cmd> config and parse YAML output.
+
+    Results are cached in-process, keyed by command, cwd, and compose file mtimes.
+    """
     command = cmd or resolve_command()
+    key = _config_cache_key(command)
+    cached = _CONFIG_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     result = process.run(command + ["config"])
     if result.returncode != 0:
         raise RuntimeError(f"compose config failed: {result.stderr}")
-    return yaml.safe_load(result.stdout)
+    parsed = yaml.load(result.stdout, Loader=_YamlLoader)
+    _CONFIG_CACHE[key] = parsed
+    return parsed
@@ -1,9 +1,19 @@
 """Parse compose config into ServiceConfig objects."""
 
+import operator
 from dataclasses import dataclass
 
+_K_ROLE = "deploy.role"
+_K_ORDER = "deploy.order"
+_K_DRAIN = "deploy.drain"
+_K_HC_TIMEOUT = "deploy.healthcheck.timeout"
+_K_HC_POLL = "deploy.healthcheck.poll"
+_K_HOST = "deploy.host"
+_K_USER = "deploy.user"
+_K_DIR = "deploy.dir"
 
-@dataclass
+
+@dataclass(slots=True)
 class ServiceConfig:
     name: str
     role: str
@@ -12,6 +22,7 @@ class ServiceConfig:
     drain: int
     healthcheck_timeout: int
     healthcheck_poll: int
+    healthcheck_retries: int
     has_healthcheck: bool
     file_order: int
     host: str | None = None
@@ -23,11 +34,6 @@ class ServiceConfig:
         return self.role == "app"
 
 
-def _get_label(labels: dict, key: str, default=None):
-    """Get a label value, with optional default."""
-    return labels.get(key, default)
-
-
 def _parse_x_deploy(compose_dict: dict) -> dict:
     """Extract x-deploy top-level defaults."""
     return (compose_dict or {}).get("x-deploy", {})
@@ -50,32 +56,31 @@ def parse_services(compose_dict: dict) -> list[ServiceConfig]:
         labels = svc.get("labels", {})
         if isinstance(labels, list):
             # Convert list format ["key=value", ...] to dict
-            parsed = {}
-            for item in labels:
-                k, _, v = item.partition("=")
-                parsed[k] = v
-            labels = parsed
+            labels = dict(item.partition("=")[::2] for item in labels)
 
-        role = _get_label(labels, "deploy.role")
+        role = labels.get(_K_ROLE)
         if role is None:
             continue
 
-        has_healthcheck = "healthcheck" in svc and svc["healthcheck"].get("test") is not None
+        healthcheck = svc.get("healthcheck") or {}
+        has_healthcheck = healthcheck.get("test") is not None
 
         # Host discovery: per-service label → x-deploy default → None
-        host = _get_label(labels, "deploy.host") or x_deploy.get("host")
-        user = _get_label(labels, "deploy.user") or x_deploy.get("user")
-        svc_dir = _get_label(labels, "deploy.dir") or x_deploy.get("dir")
+        host = labels.get(_K_HOST) or x_deploy.get("host")
+        user = labels.get(_K_USER) or x_deploy.get("user")
+        svc_dir = labels.get(_K_DIR) or x_deploy.get("dir")
 
         configs.append(
             ServiceConfig(
                 name=name,
                 role=role,
                 image=svc.get("image"),
-                order=int(_get_label(labels, "deploy.order", "100")),
-                drain=int(_get_label(labels, "deploy.drain", "30")),
-                healthcheck_timeout=int(_get_label(labels, "deploy.healthcheck.timeout", "120")),
-                healthcheck_poll=int(_get_label(labels, "deploy.healthcheck.poll", "2")),
+                order=int(labels.get(_K_ORDER, "100")),
+                drain=int(labels.get(_K_DRAIN, "30")),
+                healthcheck_timeout=int(labels.get(_K_HC_TIMEOUT, "120")),
+                healthcheck_poll=int(labels.get(_K_HC_POLL, "2")),
+                # Docker's default of 3 also applies when retries is unset or 0
+                healthcheck_retries=int(healthcheck.get("retries") or 3),
                 has_healthcheck=has_healthcheck,
                 file_order=idx,
                 host=host,
@@ -84,7 +89,7 @@ def parse_services(compose_dict: dict) -> list[ServiceConfig]:
             )
         )
 
-    configs.sort(key=lambda s: (s.order, s.file_order))
+    configs.sort(key=operator.attrgetter("order", "file_order"))
     return configs
 
 
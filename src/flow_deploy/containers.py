@@ -1,8 +1,9 @@
 """Docker inspect, identify old/new, stop/rm."""
 
-import json
+import threading
+import time
 
-from flow_deploy import process
+from flow_deploy import jsonio, process
 
 
 def get_containers_for_service(service: str, project: str = "") -> list[dict]:
@@ -15,15 +16,9 @@ def get_containers_for_service(service: str, project: str = "") -> list[dict]:
         filters += ["--filter", f"label=com.docker.compose.project={project}"]
     filters += ["--filter", "status=running"]
 
-    result = process.run(["docker", "ps"] + filters + ["--format", "{{json .}}"])
-    if result.returncode != 0:
-        return []
-
-    containers = []
-    for line in result.stdout.strip().splitlines():
-        if line.strip():
-            containers.append(json.loads(line))
-    return containers
+    # docker ps prints nothing to stdout on failure, so an error yields []
+    lines = process.run_lines(["docker", "ps"] + filters + ["--format", "{{json .}}"])
+    return [jsonio.loads(line) for line in lines if line.strip()]
 
 
 def identify_old_new(containers: list[dict], new_tag: str) -> tuple[dict | None, dict | None]:
@@ -37,14 +32,14 @@ def identify_old_new(containers: list[dict], new_tag: str) -> tuple[dict | None,
 
     a, b = containers
 
-    a_image = a.get("Image", "")
-    b_image = b.get("Image", "")
-
     # Different tags — match by tag
-    if new_tag and a_image.endswith(f":{new_tag}") and not b_image.endswith(f":{new_tag}"):
-        return b, a
-    if new_tag and b_image.endswith(f":{new_tag}") and not a_image.endswith(f":{new_tag}"):
-        return a, b
+    if new_tag:
+        a_new = a.get("Image", "").rpartition(":")[2] == new_tag
+        b_new = b.get("Image", "").rpartition(":")[2] == new_tag
+        if a_new and not b_new:
+            return b, a
+        if b_new and not a_new:
+            return a, b
 
     # Same tag or can't determine by tag — use creation time (newer = new container)
     a_created = a.get("CreatedAt", "")
@@ -57,18 +52,155 @@ def identify_old_new(containers: list[dict], new_tag: str) -> tuple[dict | None,
     return None, None
 
 
-def get_container_health(container_id: str) -> str | None:
-    """Get health status of a container via docker inspect.
+def get_container_health(container_id: str) -> dict | None:
+    """Get the health state of a container via docker inspect.
 
-    Returns 'healthy', 'unhealthy', 'starting', or None.
+    Returns {"status": ..., "failing_streak": ..., "log": [...]} where status is
+    'healthy', 'unhealthy', or 'starting'; None if there is no healthcheck or
+    the container can't be inspected.
     """
-    result = process.run(
-        ["docker", "inspect", "--format", "{{.State.Health.Status}}", container_id]
-    )
+    result = process.run(["docker", "inspect", "--format", "{{json .State.Health}}", container_id])
     if result.returncode != 0:
         return None
-    status = result.stdout.strip()
-    return status if status else None
+    try:
+        health = jsonio.loads(result.stdout)
+    except jsonio.JSONDecodeError:
+        return None
+    if not health:
+        return None
+    return {
+        "status": health.get("Status") or None,
+        "failing_streak": health.get("FailingStreak", 0),
+        "log": health.get("Log") or [],
+    }
+
+
+def get_container_health_batch(container_ids: list[str]) -> dict[str, str | None]:
+    """Get health status of many containers with a single docker inspect.
+
+    Returns a dict mapping each given ID to 'healthy', 'unhealthy', 'starting', or None.
+    """
+    health: dict[str, str | None] = dict.fromkeys(container_ids)
+    if not container_ids:
+        return health
+
+    result = process.run(
+        [
+            "docker",
+            "inspect",
+            "--format",
+            "{{.ID}} {{if .State.Health}}{{.State.Health.Status}}{{else}}none{{end}}",
+        ]
+        + container_ids
+    )
+    # Non-zero exit means at least one ID was missing; the rest are still printed
+    for line in result.stdout.splitlines():
+        full_id, _, status = line.strip().partition(" ")
+        for cid in container_ids:
+            # docker ps reports truncated IDs, inspect reports full ones
+            if cid and full_id.startswith(cid):
+                health[cid] = status if status and status != "none" else None
+    return health
+
+
+class _HealthWaiter:
+    __slots__ = ("event", "status")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.status: str | None = None
+
+
+class HealthWatcher:
+    """Dispatch health_status events from one shared `docker events` stream.
+
+    A background thread reads the stream and wakes whichever wait() call
+    registered the container, so concurrent waits share one subprocess.
+    If the stream ends (stopped, or `docker events` unavailable), pending
+    and future waits return None so callers can fall back to polling.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: dict[str, _HealthWaiter] = {}
+        self._stream: process.LineStream | None = None
+        self._thread: threading.Thread | None = None
+        self._alive = False
+
+    def start(self) -> None:
+        """Subscribe to health_status events from now on."""
+        self._stream = process.open_lines(
+            [
+                "docker",
+                "events",
+                "--filter",
+                "type=container",
+                "--filter",
+                "event=health_status",
+                "--format",
+                "{{.ID}} {{.Status}}",
+                # Replay from subscription time so nothing is lost while docker connects
+                "--since",
+                str(int(time.time())),
+            ]
+        )
+        self._alive = True
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Kill the event stream and wait for the reader thread to exit."""
+        if self._stream is not None:
+            self._stream.close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _read(self) -> None:
+        for line in self._stream:
+            # e.g. "<full id> health_status: healthy"
+            full_id, _, status = line.strip().partition(" ")
+            status = status.rpartition(" ")[2]
+            if status not in ("healthy", "unhealthy"):
+                continue
+            with self._lock:
+                for cid, waiter in self._waiters.items():
+                    if full_id.startswith(cid):
+                        waiter.status = status
+                        waiter.event.set()
+
+        with self._lock:
+            self._alive = False
+            for waiter in self._waiters.values():
+                waiter.event.set()
+
+    def register(self, container_id: str) -> _HealthWaiter:
+        """Start collecting health events for a container."""
+        waiter = _HealthWaiter()
+        with self._lock:
+            self._waiters[container_id] = waiter
+            if not self._alive:
+                waiter.event.set()
+        return waiter
+
+    def unregister(self, container_id: str) -> None:
+        with self._lock:
+            self._waiters.pop(container_id, None)
+
+    def wait(self, container_id: str, timeout: float) -> str | None:
+        """Block until the container reports a final health status.
+
+        Returns 'healthy' or 'unhealthy', or None on timeout or if the stream ended.
+        """
+        waiter = self.register(container_id)
+        try:
+            # Prime after registering so a transition before the first event isn't missed
+            health = get_container_health(container_id)
+            if health and health["status"] in ("healthy", "unhealthy"):
+                return health["status"]
+            waiter.event.wait(timeout)
+            return waiter.status
+        finally:
+            self.unregister(container_id)
 
 
 def stop_container(container_id: str, timeout: int = 30) -> bool:
@@ -81,3 +213,13 @@ def remove_container(container_id: str) -> bool:
     """Remove a container. Returns True on success."""
     result = process.run(["docker", "rm", container_id])
     return result.returncode == 0
+
+
+def stop_and_remove(container_id: str, timeout: int = 30) -> bool:
+    """Gracefully stop, then remove a container. Returns True if it was removed.
+
+    `docker rm --force` would do this in one call, but it sends SIGKILL and
+    skips the drain timeout.
+    """
+    stop_container(container_id, timeout=timeout)
+    return remove_container(container_id)
@@ -2,6 +2,7 @@
 
 import signal
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from flow_deploy import compose, config, containers, lock, log, tags
 
@@ -75,13 +76,24 @@ def deploy(
 
         start_time = time.time()
 
-        for svc in app_services:
-            result = _deploy_service(svc, tag, compose_cmd)
-            if result != 0:
-                log.info("")
-                log.footer("FAILED (deploy aborted)")
-                lock.release()
-                return 1
+        if _pull_all(app_services, tag, compose_cmd) != 0:
+            log.info("")
+            log.footer("FAILED (deploy aborted)")
+            lock.release()
+            return 1
+
+        watcher = containers.HealthWatcher()
+        watcher.start()
+        try:
+            for svc in app_services:
+                result = _cutover(svc, tag, compose_cmd, watcher)
+                if result != 0:
+                    log.info("")
+                    log.footer("FAILED (deploy aborted)")
+                    lock.release()
+                    return 1
+        finally:
+            watcher.stop()
 
         elapsed = time.time() - start_time
         tags.write_tag(tag)
@@ -96,25 +108,47 @@ def deploy(
     return 0
 
 
-def _deploy_service(svc: config.ServiceConfig, tag: str, compose_cmd: list[str]) -> int:
-    """Deploy a single service. Returns 0 on success, 1 on failure."""
-    log.service_start(svc.name)
-    svc_start = time.time()
+def _pull_all(services: list[config.ServiceConfig], tag: str, compose_cmd: list[str]) -> int:
+    """Pull images for all services concurrently. Returns 0 if every pull succeeded."""
+    log.service_start("pull")
+    # Pulls are independent and network-bound; the cutover phase stays sequential
+    pool = ThreadPoolExecutor(max_workers=min(8, len(services)))
+    try:
+        results = list(pool.map(lambda svc: _pull(svc, tag, compose_cmd), services))
+    finally:
+        # On SIGTERM/SIGINT, skip queued pulls but let running ones finish, so the
+        # lock isn't released while a pull is still in flight
+        pool.shutdown(wait=True, cancel_futures=True)
+    log.service_end()
+    return 1 if any(results) else 0
 
-    env = {"DEPLOY_TAG": tag}
 
-    # 1. Pull
+def _pull(svc: config.ServiceConfig, tag: str, compose_cmd: list[str]) -> int:
+    """Pull a single service's image. Returns 0 on success, 1 on failure."""
     image_name = (svc.image or svc.name).rsplit(":", 1)[0]
-    log.step(f"pulling {image_name}:{tag}...")
+    log.step(f"pulling {image_name}:{tag} ({svc.name})...")
     pull_start = time.time()
-    result = compose.compose_run(["pull", svc.name], env=env, cmd=compose_cmd)
+    result = compose.compose_run(["pull", svc.name], env={"DEPLOY_TAG": tag}, cmd=compose_cmd)
     if result.returncode != 0:
-        log.failure(f"pull failed: {result.stderr.strip()}")
-        log.service_end()
+        log.failure(f"{svc.name} pull failed: {result.stderr.strip()}")
         return 1
-    log.step(f"pulled ({time.time() - pull_start:.1f}s)")
+    log.step(f"pulled {svc.name} ({time.time() - pull_start:.1f}s)")
+    return 0
 
-    # 2. Scale to 2
+
+def _cutover(
+    svc: config.ServiceConfig,
+    tag: str,
+    compose_cmd: list[str],
+    watcher: containers.HealthWatcher,
+) -> int:
+    """Roll a single (already pulled) service over. Returns 0 on success, 1 on failure."""
+    log.service_start(svc.name)
+    svc_start = time.time()
+
+    env = {"DEPLOY_TAG": tag}
+
+    # 1. Scale to 2
     log.step("starting new container...")
     result = compose.compose_run(
         ["up", "-d", "--no-deps", "--no-recreate", "--scale", f"{svc.name}=2", svc.name],
@@ -126,7 +160,7 @@ def _deploy_service(svc: config.ServiceConfig, tag: str, compose_cmd: list[str])
         log.service_end()
         return 1
 
-    # 3. Get containers, identify old vs new
+    # 2. Get containers, identify old vs new
     ctrs = containers.get_containers_for_service(svc.name)
     if len(ctrs) != 2:
         log.failure(f"Expected 2 containers, found {len(ctrs)}")
@@ -144,18 +178,19 @@ def _deploy_service(svc: config.ServiceConfig, tag: str, compose_cmd: list[str])
     new_id = new["ID"]
     old_id = old["ID"]
 
-    # 4. Wait for health check
+    # 3. Wait for health check
     log.step(f"waiting for health check (timeout: {svc.healthcheck_timeout}s)...")
-    healthy = _wait_for_healthy(new_id, svc.healthcheck_timeout, svc.healthcheck_poll)
+    healthy = _wait_for_healthy(
+        new_id, svc.healthcheck_timeout, svc.healthcheck_poll, watcher, svc.healthcheck_retries
+    )
 
     if healthy:
         health_elapsed = time.time() - svc_start
         log.step(f"healthy ({health_elapsed:.1f}s)")
 
-        # 5a. Cutover: stop old, remove old, scale back
+        # 4a. Cutover: stop old, remove old, scale back
         log.step(f"draining old container ({old_id[:7]}, {svc.drain}s timeout)...")
-        containers.stop_container(old_id, timeout=svc.drain)
-        containers.remove_container(old_id)
+        containers.stop_and_remove(old_id, timeout=svc.drain)
         _scale_back(svc.name, env, compose_cmd)
 
         elapsed = time.time() - svc_start
@@ -163,10 +198,9 @@ def _deploy_service(svc: config.ServiceConfig, tag: str, compose_cmd: list[str])
         log.service_end()
         return 0
     else:
-        # 5b. Rollback: stop new, remove new, scale back
+        # 4b. Rollback: stop new, remove new, scale back
         log.step(f"rolling back: stopping new container ({new_id[:7]})...")
-        containers.stop_container(new_id)
-        containers.remove_container(new_id)
+        containers.stop_and_remove(new_id)
         _scale_back(svc.name, env, compose_cmd)
         log.step("rollback complete, old container still serving")
         log.failure(f"{svc.name} FAILED")
@@ -174,15 +208,31 @@ def _deploy_service(svc: config.ServiceConfig, tag: str, compose_cmd: list[str])
         return 1
 
 
-def _wait_for_healthy(container_id: str, timeout: int, poll_interval: int) -> bool:
-    """Poll docker inspect for container health. Returns True if healthy."""
+def _wait_for_healthy(
+    container_id: str,
+    timeout: int,
+    poll_interval: int,
+    watcher: containers.HealthWatcher,
+    retries: int = 3,
+) -> bool:
+    """Wait for container health via docker events. Returns True if healthy.
+
+    Falls back to polling docker inspect if the event stream ends early; while
+    polling, gives up as soon as the failing streak reaches the healthcheck's
+    retries instead of waiting for the status to flip.
+    """
     deadline = time.time() + timeout
+    status = watcher.wait(container_id, timeout)
+    if status is not None:
+        return status == "healthy"
+
     while time.time() < deadline:
-        status = containers.get_container_health(container_id)
-        if status == "healthy":
-            return True
-        if status == "unhealthy":
-            return False
+        health = containers.get_container_health(container_id)
+        if health:
+            if health["status"] == "healthy":
+                return True
+            if health["status"] == "unhealthy" or health["failing_streak"] >= retries:
+                return False
         time.sleep(poll_interval)
     return False
 
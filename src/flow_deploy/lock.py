@@ -1,11 +1,15 @@
 """.deploy-lock acquire/release/stale recovery."""
 
-import json
 import os
 import time
 
+from flow_deploy import jsonio
+
 LOCK_FILE = ".deploy-lock"
 
+# Unparseable locks younger than this may belong to an older writer still mid-write
+_CORRUPT_GRACE = 10
+
 
 def _lock_path() -> str:
     return LOCK_FILE
@@ -26,21 +30,63 @@ def acquire() -> bool:
     Automatically breaks stale locks (holding PID no longer running).
     """
     path = _lock_path()
+    # Fully written before it's linked into place, so readers never see a partial lock
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(jsonio.dumps({"pid": os.getpid(), "timestamp": time.time()}))
 
-    if os.path.exists(path):
-        try:
-            with open(path) as f:
-                data = json.load(f)
-            pid = data["pid"]
-            if _is_pid_running(pid):
-                return False
-            # Stale lock — break it
-        except (json.JSONDecodeError, KeyError, TypeError):
-            pass  # Corrupt lock file — overwrite it
+    try:
+        # Second attempt only happens after breaking a stale or corrupt lock
+        for _ in range(2):
+            try:
+                os.link(tmp, path)
+                return True
+            except FileExistsError:
+                if not _break_stale(path):
+                    return False
+        return False
+    finally:
+        os.unlink(tmp)
+
+
+def _break_stale(path: str) -> bool:
+    """Move aside a lock whose holder is gone. Returns False if the lock is live."""
+    try:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+    except FileNotFoundError:
+        return True  # Released in the meantime
 
-    with open(path, "w") as f:
-        json.dump({"pid": os.getpid(), "timestamp": time.time()}, f)
-    return True
+    try:
+        if _is_pid_running(jsonio.loads(data)["pid"]):
+            return False
+        # Stale lock — break it
+    except (jsonio.JSONDecodeError, KeyError, TypeError):
+        # Corrupt lock file — break it once it's clearly not being written
+        if time.time() - st.st_mtime < _CORRUPT_GRACE:
+            return False
+
+    # Rename rather than unlink so we can tell if we took the lock we judged
+    aside = f"{path}.{os.getpid()}.stale"
+    try:
+        os.rename(path, aside)
+    except FileNotFoundError:
+        return True
+    try:
+        # Compare contents, not inodes: a freed inode can be reused by the new lock
+        with open(aside, "rb") as f:
+            taken = f.read()
+        if taken != data:
+            # Another process broke it first and took the lock; put theirs back
+            try:
+                os.link(aside, path)
+            except FileExistsError:
+                pass
+            return False
+        return True
+    finally:
+        os.unlink(aside)
 
 
 def release() -> None:
@@ -53,10 +99,10 @@ def release() -> None:
 def read_lock() -> dict | None:
     """Read current lock info, or None if not locked."""
     path = _lock_path()
-    if not os.path.exists(path):
-        return None
     try:
-        with open(path) as f:
-            return json.load(f)
-    except (json.JSONDecodeError, TypeError):
+        with open(path, "rb") as f:
+            return jsonio.loads(f.read())
+    except FileNotFoundError:
+        return None
+    except (jsonio.JSONDecodeError, TypeError):
         return None
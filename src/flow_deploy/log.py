@@ -2,15 +2,14 @@
 
 import os
 import sys
-from datetime import datetime
+import time
 
-
-def _timestamp() -> str:
-    return datetime.now().strftime("%H:%M:%S")
+# Resolved once: the environment doesn't change mid-run
+_GHA = os.environ.get("GITHUB_ACTIONS") == "true"
 
 
-def _is_github_actions() -> bool:
-    return os.environ.get("GITHUB_ACTIONS") == "true"
+def _timestamp() -> str:
+    return time.strftime("%H:%M:%S")
 
 
 def info(msg: str) -> None:
@@ -19,7 +18,7 @@ def info(msg: str) -> None:
 
 def header(title: str) -> None:
     line = f"── {title} " + "─" * max(0, 45 - len(title))
-    if _is_github_actions():
+    if _GHA:
         print(f"::group::{title}", flush=True)
     info(line)
 
@@ -27,18 +26,18 @@ def header(title: str) -> None:
 def footer(title: str) -> None:
     line = f"── {title} " + "─" * max(0, 45 - len(title))
     info(line)
-    if _is_github_actions():
+    if _GHA:
         print("::endgroup::", flush=True)
 
 
 def service_start(name: str) -> None:
-    if _is_github_actions():
+    if _GHA:
         print(f"::group::{name}", flush=True)
     info(f"▸ {name}")
 
 
 def service_end() -> None:
-    if _is_github_actions():
+    if _GHA:
         print("::endgroup::", flush=True)
 
 
@@ -51,12 +50,12 @@ def success(msg: str) -> None:
 
 
 def failure(msg: str) -> None:
-    if _is_github_actions():
+    if _GHA:
         print(f"::error::{msg}", flush=True)
     info(f"  ✗ {msg}")
 
 
 def error(msg: str) -> None:
-    if _is_github_actions():
+    if _GHA:
         print(f"::error::{msg}", flush=True)
     print(f"[{_timestamp()}] ERROR: {msg}", file=sys.stderr, flush=True)
@@ -1,23 +1,39 @@
 """Subprocess wrapper — the single mock seam for all tests."""
 
+import functools
+import os
 import subprocess
+from collections.abc import Iterator
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True)
 class Result:
     returncode: int
     stdout: str
     stderr: str
 
 
+@functools.lru_cache(maxsize=8)
+def _merged_env_for(env_items: tuple[tuple[str, str], ...]) -> dict[str, str]:
+    return os.environ | dict(env_items)
+
+
+def _merged_env(env: dict[str, str] | None) -> dict[str, str] | None:
+    """Overlay *env* on os.environ, or None to inherit the environment unchanged.
+
+    Memoized per overlay, so repeated calls with the same env (e.g. DEPLOY_TAG
+    for every compose call in a deploy) reuse one dict. os.environ is treated
+    as fixed for the life of the process.
+    """
+    if env is None:
+        return None
+    return _merged_env_for(tuple(sorted(env.items())))
+
+
 def run(args: list[str], env: dict[str, str] | None = None, cwd: str | None = None) -> Result:
     """Run a command and capture output. Raises on non-zero exit."""
-    merged_env = None
-    if env is not None:
-        import os
-
-        merged_env = {**os.environ, **env}
+    merged_env = _merged_env(env)
 
     proc = subprocess.run(
         args,
@@ -33,11 +49,7 @@ def run_streaming(
     args: list[str], env: dict[str, str] | None = None, cwd: str | None = None
 ) -> int:
     """Run a command with passthrough stdout/stderr. Returns exit code."""
-    merged_env = None
-    if env is not None:
-        import os
-
-        merged_env = {**os.environ, **env}
+    merged_env = _merged_env(env)
 
     proc = subprocess.run(
         args,
@@ -45,3 +57,53 @@ def run_streaming(
         cwd=cwd,
     )
     return proc.returncode
+
+
+class LineStream:
+    """A running command whose stdout lines can be iterated.
+
+    close() kills the command and may be called from any thread, which
+    ends iteration in the reading thread.
+    """
+
+    def __init__(self, proc: subprocess.Popen):
+        self._proc = proc
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            yield from self._proc.stdout
+        finally:
+            self._proc.stdout.close()
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.wait()
+
+
+def open_lines(
+    args: list[str], env: dict[str, str] | None = None, cwd: str | None = None
+) -> LineStream:
+    """Start a command and return a LineStream over its stdout."""
+    merged_env = _merged_env(env)
+
+    proc = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        env=merged_env,
+        cwd=cwd,
+    )
+    return LineStream(proc)
+
+
+def run_lines(
+    args: list[str], env: dict[str, str] | None = None, cwd: str | None = None
+) -> Iterator[str]:
+    """Run a command and yield stdout lines as they arrive. Kills the process on early exit."""
+    stream = open_lines(args, env=env, cwd=cwd)
+    try:
+        yield from stream
+    finally:
+        stream.close()
@@ -1,8 +1,13 @@
 """.deploy-tag history — newline-delimited, newest last, max 10."""
 
+import os
+
 TAG_FILE = ".deploy-tag"
 MAX_HISTORY = 10
 
+# Enough for several max-length (128 char) docker tags
+_TAIL_BYTES = 1024
+
 
 def _tag_path() -> str:
     return TAG_FILE
@@ -19,16 +24,35 @@ def read_tags() -> list[str]:
         return []
 
 
+def tail_tags(n: int) -> list[str]:
+    """Return the newest *n* tags (oldest first), reading only the end of the file."""
+    path = _tag_path()
+    try:
+        with open(path, "rb") as f:
+            offset = max(0, os.fstat(f.fileno()).st_size - _TAIL_BYTES)
+            f.seek(offset)
+            lines = f.read().split(b"\n")
+    except FileNotFoundError:
+        return []
+
+    if offset:
+        lines = lines[1:]  # Seeked into the middle of a line
+    tags = [line.strip().decode() for line in lines if line.strip()]
+    if offset and len(tags) < n:
+        return read_tags()[-n:]
+    return tags[-n:]
+
+
 def current_tag() -> str | None:
     """Return the most recently deployed tag, or None."""
-    tags = read_tags()
+    tags = tail_tags(1)
     return tags[-1] if tags else None
 
 
 def previous_tag() -> str | None:
     """Return the tag before the current one, or None."""
-    tags = read_tags()
-    return tags[-2] if len(tags) >= 2 else None
+    tags = tail_tags(2)
+    return tags[0] if len(tags) == 2 else None
 
 
 def write_tag(tag: str) -> None:
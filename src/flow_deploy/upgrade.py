@@ -1,5 +1,6 @@
 """Upgrade flow-deploy to the latest release."""
 
+import functools
 import os
 import shutil
 import stat
@@ -10,6 +11,7 @@ import tempfile
 REPO = "flowcanon/deploy"
 
 
+@functools.lru_cache(maxsize=1)
 def _detect_libc() -> str:
     """Detect whether the system uses musl or glibc."""
     try:
@@ -1,27 +1,91 @@
 """Shared test fixtures."""
 
+import collections
+
 import pytest
 
+from tests.helpers import FakeLineStream
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    """Keep per-process caches from leaking between tests."""
+    from flow_deploy import compose, upgrade
+
+    compose.clear_config_cache()
+    compose.resolve_command.cache_clear()
+    upgrade._detect_libc.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def lock_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("lock")
+
 
 @pytest.fixture
-def mock_process(monkeypatch):
-    """Mock process.run and process.run_streaming for tests."""
-    from flow_deploy import process
+def isolated_lock_dir(lock_dir, monkeypatch):
+    """Chdir into the shared lock/tag directory and remove the state files afterwards."""
+    from flow_deploy import lock, tags
+
+    monkeypatch.chdir(lock_dir)
+    yield lock_dir
+    for name in (lock.LOCK_FILE, tags.TAG_FILE):
+        (lock_dir / name).unlink(missing_ok=True)
+
+
+class _MockProcess:
+    """Fake process entry points that record calls and replay queued responses."""
 
-    calls = []
-    responses = []
+    __slots__ = ("calls", "responses")
 
-    def fake_run(args, env=None, cwd=None):
-        calls.append(("run", args, env, cwd))
-        if responses:
-            return responses.pop(0)
+    def __init__(self):
+        self.calls = []
+        self.responses = collections.deque()
+
+    def reset(self):
+        self.calls.clear()
+        self.responses.clear()
+
+    def run(self, args, env=None, cwd=None):
+        from flow_deploy import process
+
+        self.calls.append(("run", args, env, cwd))
+        if self.responses:
+            return self.responses.popleft()
         return process.Result(returncode=0, stdout="", stderr="")
 
-    def fake_run_streaming(args, env=None, cwd=None):
-        calls.append(("run_streaming", args, env, cwd))
+    def run_streaming(self, args, env=None, cwd=None):
+        self.calls.append(("run_streaming", args, env, cwd))
         return 0
 
-    monkeypatch.setattr(process, "run", fake_run)
-    monkeypatch.setattr(process, "run_streaming", fake_run_streaming)
+    def run_lines(self, args, env=None, cwd=None):
+        self.calls.append(("run_lines", args, env, cwd))
+        if self.responses:
+            yield from self.responses.popleft().stdout.splitlines(keepends=True)
+
+    def open_lines(self, args, env=None, cwd=None):
+        # Long-lived streams run on background threads, so they never consume responses
+        self.calls.append(("open_lines", args, env, cwd))
+        return FakeLineStream()
+
+
+@pytest.fixture(scope="session")
+def _mock_process_session():
+    # Session scope is per worker under pytest-xdist; tests share nothing else
+    return _MockProcess()
+
+
+@pytest.fixture
+def mock_process(_mock_process_session, monkeypatch):
+    """Mock the process module's subprocess entry points for tests.
+
+    The fake is built once per session and reset per test; the patches
+    themselves stay per test so test_process.py still sees the real module.
+    """
+    from flow_deploy import process
 
-    return type("MockProcess", (), {"calls": calls, "responses": responses})()
+    mock = _mock_process_session
+    mock.reset()
+    for name in ("run", "run_streaming", "run_lines", "open_lines"):
+        monkeypatch.setattr(process, name, getattr(mock, name))
+    return mock
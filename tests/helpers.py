@@ -0,0 +1,43 @@
+"""Shared test doubles."""
+
+import queue
+
+
+class FakeLineStream:
+    """Stand-in for process.LineStream fed from a queue.
+
+    Ends after *lines* unless *keep_open*, in which case it ends on close().
+    """
+
+    def __init__(self, lines=(), keep_open=False):
+        self._queue = queue.Queue()
+        for line in lines:
+            self._queue.put(line)
+        if not keep_open:
+            self._queue.put(None)
+
+    def push(self, line):
+        self._queue.put(line)
+
+    def __iter__(self):
+        while (line := self._queue.get()) is not None:
+            yield line
+
+    def close(self):
+        self._queue.put(None)
+
+
+class Recorder:
+    """Callable stand-in that records its calls and returns *return_value*."""
+
+    def __init__(self, return_value=None):
+        self.return_value = return_value
+        self.calls = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return self.return_value
+
+    @property
+    def call_args(self):
+        return self.calls[-1][0]
@@ -1,135 +1,136 @@
 """Tests for cli.py — Click CLI commands."""
 
-from unittest.mock import patch
-
+import pytest
 from click.testing import CliRunner
 
+from flow_deploy import cli, process
 from flow_deploy.cli import main
-
-
-@patch("flow_deploy.deploy.deploy")
-def test_deploy_defaults(mock_deploy):
-    mock_deploy.return_value = 0
-    runner = CliRunner()
-    result = runner.invoke(main, ["deploy", "--tag", "abc123"])
-    assert result.exit_code == 0
-    mock_deploy.assert_called_once_with(tag="abc123", services_filter=None, dry_run=False)
-
-
-@patch("flow_deploy.deploy.deploy")
-def test_deploy_with_services(mock_deploy):
-    mock_deploy.return_value = 0
-    runner = CliRunner()
-    result = runner.invoke(
-        main, ["deploy", "--tag", "v1", "--service", "web", "--service", "worker"]
+from tests.helpers import Recorder
+
+_runner = CliRunner()
+
+
+def _record(monkeypatch, target, return_value=0):
+    rec = Recorder(return_value=return_value)
+    monkeypatch.setattr(target, rec)
+    return rec
+
+
+def _exit_code(cmd, **params):
+    """Call a command's callback directly and return the code it exits with."""
+    with pytest.raises(SystemExit) as exc:
+        cmd.callback(**params)
+    return exc.value.code
+
+
+@pytest.mark.parametrize(
+    "params,expected_kwargs,rc",
+    [
+        (
+            {"tag": "abc123", "service": (), "dry_run": False},
+            {"tag": "abc123", "services_filter": None, "dry_run": False},
+            0,
+        ),
+        (
+            {"tag": "v1", "service": ("web", "worker"), "dry_run": False},
+            {"tag": "v1", "services_filter": ["web", "worker"], "dry_run": False},
+            0,
+        ),
+        (
+            {"tag": None, "service": (), "dry_run": True},
+            {"tag": None, "services_filter": None, "dry_run": True},
+            0,
+        ),
+        (
+            {"tag": None, "service": (), "dry_run": False},
+            {"tag": None, "services_filter": None, "dry_run": False},
+            2,
+        ),
+    ],
+    ids=["defaults", "with_services", "dry_run", "exit_code_propagated"],
+)
+def test_deploy(monkeypatch, params, expected_kwargs, rc):
+    rec = _record(monkeypatch, "flow_deploy.deploy.deploy", return_value=rc)
+    assert _exit_code(cli.deploy, **params) == rc
+    assert rec.calls == [((), expected_kwargs)]
+
+
+@pytest.mark.parametrize(
+    "service,expected_filter,rc",
+    [((), None, 0), (("web",), ["web"], 0), ((), None, 1)],
+    ids=["all", "with_service", "failure"],
+)
+def test_rollback(monkeypatch, service, expected_filter, rc):
+    rec = _record(monkeypatch, "flow_deploy.deploy.rollback", return_value=rc)
+    assert _exit_code(cli.rollback, service=service) == rc
+    assert rec.calls == [((), {"services_filter": expected_filter})]
+
+
+def test_status(mock_process, monkeypatch, tmp_path, capsys):
+    monkeypatch.chdir(tmp_path)
+    config_yaml = (
+        "services:\n"
+        "  web:\n"
+        "    image: app:latest\n"
+        "    labels:\n"
+        "      deploy.role: app\n"
+        "  worker:\n"
+        "    image: app:latest\n"
+        "    labels:\n"
+        "      deploy.role: app\n"
     )
-    assert result.exit_code == 0
-    mock_deploy.assert_called_once_with(tag="v1", services_filter=["web", "worker"], dry_run=False)
-
-
-@patch("flow_deploy.deploy.deploy")
-def test_deploy_dry_run(mock_deploy):
-    mock_deploy.return_value = 0
-    runner = CliRunner()
-    result = runner.invoke(main, ["deploy", "--dry-run"])
-    assert result.exit_code == 0
-    mock_deploy.assert_called_once_with(tag=None, services_filter=None, dry_run=True)
-
-
-@patch("flow_deploy.deploy.deploy")
-def test_deploy_exit_code_propagated(mock_deploy):
-    mock_deploy.return_value = 2
-    runner = CliRunner()
-    result = runner.invoke(main, ["deploy"])
-    assert result.exit_code == 2
-
-
-@patch("flow_deploy.deploy.rollback")
-def test_rollback(mock_rollback):
-    mock_rollback.return_value = 0
-    runner = CliRunner()
-    result = runner.invoke(main, ["rollback"])
-    assert result.exit_code == 0
-    mock_rollback.assert_called_once_with(services_filter=None)
-
-
-@patch("flow_deploy.deploy.rollback")
-def test_rollback_with_service(mock_rollback):
-    mock_rollback.return_value = 0
-    runner = CliRunner()
-    result = runner.invoke(main, ["rollback", "--service", "web"])
-    assert result.exit_code == 0
-    mock_rollback.assert_called_once_with(services_filter=["web"])
-
-
-@patch("flow_deploy.deploy.rollback")
-def test_rollback_failure(mock_rollback):
-    mock_rollback.return_value = 1
-    runner = CliRunner()
-    result = runner.invoke(main, ["rollback"])
-    assert result.exit_code == 1
+    container = '{"ID": "abc123def456", "Image": "app:v1", "State": "running"}'
+    mock_process.responses.extend(
+        [
+            process.Result(0, config_yaml, ""),
+            process.Result(0, container + "\n", ""),
+            process.Result(0, "", ""),
+            process.Result(0, "abc123def456 healthy\n", ""),
+        ]
+    )
+    cli.status.callback()
+    out = capsys.readouterr().out
+    assert "web (app)  abc123def456  app:v1  running/healthy" in out
+    assert "worker (app)  no containers" in out
+    # One batched docker inspect for all containers
+    inspect_calls = [c for c in mock_process.calls if c[1][:2] == ["docker", "inspect"]]
+    assert len(inspect_calls) == 1
 
 
-def test_version():
-    runner = CliRunner()
-    result = runner.invoke(main, ["--version"])
-    assert result.exit_code == 0
-    assert "flow-deploy" in result.output
+def test_exec(monkeypatch):
+    monkeypatch.setattr("flow_deploy.compose.resolve_command", lambda: ["docker", "compose"])
+    rec = _record(monkeypatch, "flow_deploy.process.run_streaming")
+    assert _exit_code(cli.exec_cmd, service="web", command=("bash", "-c", "echo hi")) == 0
+    assert rec.calls == [((["docker", "compose", "exec", "web", "bash", "-c", "echo hi"],), {})]
 
 
-@patch("flow_deploy.process.run_streaming")
-@patch("flow_deploy.compose.resolve_command")
-def test_exec(mock_resolve, mock_streaming):
-    mock_resolve.return_value = ["docker", "compose"]
-    mock_streaming.return_value = 0
-    runner = CliRunner()
-    result = runner.invoke(main, ["exec", "web", "bash", "-c", "echo hi"])
-    assert result.exit_code == 0
-    mock_streaming.assert_called_once_with(
-        ["docker", "compose", "exec", "web", "bash", "-c", "echo hi"]
-    )
+def test_exec_no_command(monkeypatch):
+    monkeypatch.setattr("flow_deploy.compose.resolve_command", lambda: ["docker", "compose"])
+    rec = _record(monkeypatch, "flow_deploy.process.run_streaming")
+    assert _exit_code(cli.exec_cmd, service="web", command=()) == 1
+    assert rec.calls == []
 
 
-@patch("flow_deploy.process.run_streaming")
-@patch("flow_deploy.compose.resolve_command")
-def test_exec_no_command(mock_resolve, mock_streaming):
-    mock_resolve.return_value = ["docker", "compose"]
-    runner = CliRunner()
-    result = runner.invoke(main, ["exec", "web"])
-    assert result.exit_code == 1
+def test_logs(monkeypatch):
+    monkeypatch.setattr("flow_deploy.compose.resolve_command", lambda: ["docker", "compose"])
+    rec = _record(monkeypatch, "flow_deploy.process.run_streaming")
+    assert _exit_code(cli.logs, service="web", follow=True, tail=100) == 0
+    assert rec.call_args == (["docker", "compose", "logs", "--follow", "--tail", "100", "web"],)
 
 
-@patch("flow_deploy.process.run_streaming")
-@patch("flow_deploy.compose.resolve_command")
-def test_logs(mock_resolve, mock_streaming):
-    mock_resolve.return_value = ["docker", "compose"]
-    mock_streaming.return_value = 0
-    runner = CliRunner()
-    result = runner.invoke(main, ["logs", "web", "--follow", "--tail", "100"])
-    assert result.exit_code == 0
-    mock_streaming.assert_called_once_with(
-        ["docker", "compose", "logs", "--follow", "--tail", "100", "web"]
-    )
+def test_logs_basic(monkeypatch):
+    monkeypatch.setattr("flow_deploy.compose.resolve_command", lambda: ["docker", "compose"])
+    rec = _record(monkeypatch, "flow_deploy.process.run_streaming")
+    assert _exit_code(cli.logs, service="web", follow=False, tail=None) == 0
+    assert rec.call_args == (["docker", "compose", "logs", "web"],)
 
 
-@patch("flow_deploy.process.run_streaming")
-@patch("flow_deploy.compose.resolve_command")
-def test_logs_basic(mock_resolve, mock_streaming):
-    mock_resolve.return_value = ["docker", "compose"]
-    mock_streaming.return_value = 0
-    runner = CliRunner()
-    result = runner.invoke(main, ["logs", "web"])
+def test_help_and_version():
+    result = _runner.invoke(main, ["--help"])
     assert result.exit_code == 0
-    mock_streaming.assert_called_once_with(["docker", "compose", "logs", "web"])
-
+    for command in ("deploy", "rollback", "status", "exec", "logs", "upgrade"):
+        assert command in result.output
 
-def test_help():
-    runner = CliRunner()
-    result = runner.invoke(main, ["--help"])
+    result = _runner.invoke(main, ["--version"])
     assert result.exit_code == 0
-    assert "deploy" in result.output
-    assert "rollback" in result.output
-    assert "status" in result.output
-    assert "exec" in result.output
-    assert "logs" in result.output
-    assert "upgrade" in result.output
+    assert "flow-deploy" in result.output
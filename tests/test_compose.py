@@ -1,7 +1,13 @@
 """Tests for compose.py — command resolution + execution."""
 
+import os
+
+import pytest
+
 from flow_deploy import process
-from flow_deploy.compose import compose_config, compose_run, resolve_command
+from flow_deploy.compose import clear_config_cache, compose_config, compose_run, resolve_command
+
+OK_RESULT = process.Result(0, "ok\n", "")
 
 
 def test_resolve_command_env(monkeypatch):
@@ -26,11 +32,20 @@ def test_resolve_command_fallback(monkeypatch, tmp_path):
     assert resolve_command() == ["docker", "compose"]
 
 
+def test_resolve_command_cached(monkeypatch):
+    monkeypatch.setenv("COMPOSE_COMMAND", "first")
+    assert resolve_command() == ["first"]
+    monkeypatch.setenv("COMPOSE_COMMAND", "second")
+    assert resolve_command() == ["first"]
+    resolve_command.cache_clear()
+    assert resolve_command() == ["second"]
+
+
 def test_compose_run(mock_process):
-    mock_process.responses.append(process.Result(0, "ok\n", ""))
+    mock_process.responses.append(OK_RESULT)
     result = compose_run(["pull", "web"], cmd=["docker", "compose"])
     assert mock_process.calls[0][1] == ["docker", "compose", "pull", "web"]
-    assert result.stdout == "ok\n"
+    assert result is OK_RESULT
 
 
 def test_compose_run_with_env(mock_process):
@@ -40,17 +55,49 @@ def test_compose_run_with_env(mock_process):
     assert env == {"DEPLOY_TAG": "abc123"}
 
 
-def test_compose_config_parses_yaml(mock_process):
+def test_compose_config_parses_yaml(mock_process, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
     yaml_output = "services:\n  web:\n    image: myapp:latest\n"
     mock_process.responses.append(process.Result(0, yaml_output, ""))
     config = compose_config(cmd=["docker", "compose"])
     assert config["services"]["web"]["image"] == "myapp:latest"
 
 
-def test_compose_config_raises_on_failure(mock_process):
+def test_compose_config_raises_on_failure(mock_process, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
     mock_process.responses.append(process.Result(1, "", "error"))
-    try:
+    with pytest.raises(RuntimeError, match="compose config failed"):
         compose_config(cmd=["docker", "compose"])
-        raise AssertionError("Should have raised")
-    except RuntimeError as e:
-        assert "compose config failed" in str(e)
+
+
+def test_compose_config_cached(mock_process, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docker-compose.yml").write_text("services: {}\n")
+    mock_process.responses.append(process.Result(0, "services:\n  web: {}\n", ""))
+    first = compose_config(cmd=["docker", "compose"])
+    second = compose_config(cmd=["docker", "compose"])
+    assert first is second
+    assert len(mock_process.calls) == 1
+
+
+def test_compose_config_cache_invalidated_on_change(mock_process, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    compose_file = tmp_path / "docker-compose.yml"
+    compose_file.write_text("services: {}\n")
+    mock_process.responses.append(process.Result(0, "services:\n  web: {}\n", ""))
+    mock_process.responses.append(process.Result(0, "services:\n  api: {}\n", ""))
+    compose_config(cmd=["docker", "compose"])
+    os.utime(compose_file, ns=(0, 0))
+    config = compose_config(cmd=["docker", "compose"])
+    assert "api" in config["services"]
+    assert len(mock_process.calls) == 2
+
+
+def test_clear_config_cache(mock_process, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    mock_process.responses.append(process.Result(0, "services: {}\n", ""))
+    mock_process.responses.append(process.Result(0, "services: {}\n", ""))
+    compose_config(cmd=["docker", "compose"])
+    clear_config_cache()
+    compose_config(cmd=["docker", "compose"])
+    assert len(mock_process.calls) == 2
@@ -63,6 +63,37 @@ def test_parse_label_defaults():
     assert svc.healthcheck_poll == 2
 
 
+def test_parse_healthcheck_retries():
+    d = _compose_dict(
+        (
+            "web",
+            {
+                "image": "app:latest",
+                "labels": {"deploy.role": "app"},
+                "healthcheck": {"test": ["CMD", "true"], "retries": 5},
+            },
+        ),
+        ("worker", {"image": "app:latest", "labels": {"deploy.role": "app"}}),
+    )
+    web, worker = parse_services(d)
+    assert web.healthcheck_retries == 5
+    assert worker.healthcheck_retries == 3
+
+
+def test_parse_healthcheck_retries_zero_uses_default():
+    d = _compose_dict(
+        (
+            "web",
+            {
+                "image": "app:latest",
+                "labels": {"deploy.role": "app"},
+                "healthcheck": {"test": ["CMD", "true"], "retries": 0},
+            },
+        ),
+    )
+    assert parse_services(d)[0].healthcheck_retries == 3
+
+
 def test_parse_custom_labels():
     d = _compose_dict(
         (
@@ -4,12 +4,16 @@ import json
 
 from flow_deploy import process
 from flow_deploy.containers import (
+    HealthWatcher,
     get_container_health,
+    get_container_health_batch,
     get_containers_for_service,
     identify_old_new,
     remove_container,
+    stop_and_remove,
     stop_container,
 )
+from tests.helpers import FakeLineStream
 
 
 def test_get_containers_for_service(mock_process):
@@ -68,14 +72,32 @@ def test_identify_wrong_count():
     assert identify_old_new([c, c, c], "v1") == (None, None)
 
 
+def _health_json(status, failing_streak=0):
+    return json.dumps({"Status": status, "FailingStreak": failing_streak, "Log": []}) + "\n"
+
+
 def test_get_container_health(mock_process):
-    mock_process.responses.append(process.Result(0, "healthy\n", ""))
-    assert get_container_health("abc123") == "healthy"
+    mock_process.responses.append(process.Result(0, _health_json("healthy"), ""))
+    assert get_container_health("abc123") == {"status": "healthy", "failing_streak": 0, "log": []}
+    _, args, _, _ = mock_process.calls[0]
+    assert args == ["docker", "inspect", "--format", "{{json .State.Health}}", "abc123"]
 
 
 def test_get_container_health_starting(mock_process):
-    mock_process.responses.append(process.Result(0, "starting\n", ""))
-    assert get_container_health("abc123") == "starting"
+    mock_process.responses.append(process.Result(0, _health_json("starting", 2), ""))
+    health = get_container_health("abc123")
+    assert health["status"] == "starting"
+    assert health["failing_streak"] == 2
+
+
+def test_get_container_health_no_healthcheck(mock_process):
+    mock_process.responses.append(process.Result(0, "null\n", ""))
+    assert get_container_health("abc123") is None
+
+
+def test_get_container_health_bad_output(mock_process):
+    mock_process.responses.append(process.Result(0, "not json\n", ""))
+    assert get_container_health("abc123") is None
 
 
 def test_get_container_health_error(mock_process):
@@ -83,6 +105,94 @@ def test_get_container_health_error(mock_process):
     assert get_container_health("abc123") is None
 
 
+def test_get_container_health_batch(mock_process):
+    mock_process.responses.append(
+        process.Result(0, "abc123def456 healthy\n999888777666 none\n", "")
+    )
+    health = get_container_health_batch(["abc123", "999888"])
+    assert health == {"abc123": "healthy", "999888": None}
+    _, args, _, _ = mock_process.calls[0]
+    assert args[:2] == ["docker", "inspect"]
+    assert args[-2:] == ["abc123", "999888"]
+
+
+def test_get_container_health_batch_missing_id(mock_process):
+    mock_process.responses.append(process.Result(1, "abc123def456 starting\n", "No such object"))
+    health = get_container_health_batch(["abc123", "gone00"])
+    assert health == {"abc123": "starting", "gone00": None}
+
+
+def test_get_container_health_batch_empty(mock_process):
+    assert get_container_health_batch([]) == {}
+    assert mock_process.calls == []
+
+
+def _start_watcher(monkeypatch, stream):
+    monkeypatch.setattr(process, "open_lines", lambda args, env=None, cwd=None: stream)
+    watcher = HealthWatcher()
+    watcher.start()
+    return watcher
+
+
+def test_health_watcher_already_healthy(mock_process, monkeypatch):
+    watcher = _start_watcher(monkeypatch, FakeLineStream(keep_open=True))
+    mock_process.responses.append(process.Result(0, _health_json("healthy"), ""))
+    assert watcher.wait("abc123", timeout=10) == "healthy"
+    watcher.stop()
+
+
+def test_health_watcher_dispatches_event(mock_process, monkeypatch):
+    stream = FakeLineStream(keep_open=True)
+    watcher = _start_watcher(monkeypatch, stream)
+
+    def fake_health(container_id):
+        # Event arrives after registration, while the container was still starting
+        stream.push("other999 health_status: unhealthy\n")
+        stream.push("abc123def456 health_status: healthy\n")
+        return {"status": "starting", "failing_streak": 0, "log": []}
+
+    monkeypatch.setattr("flow_deploy.containers.get_container_health", fake_health)
+    assert watcher.wait("abc123", timeout=10) == "healthy"
+    watcher.stop()
+
+
+def test_health_watcher_unhealthy(mock_process, monkeypatch):
+    stream = FakeLineStream(keep_open=True)
+    watcher = _start_watcher(monkeypatch, stream)
+
+    def fake_health(container_id):
+        stream.push("abc123def456 health_status: unhealthy\n")
+        return {"status": "starting", "failing_streak": 0, "log": []}
+
+    monkeypatch.setattr("flow_deploy.containers.get_container_health", fake_health)
+    assert watcher.wait("abc123", timeout=10) == "unhealthy"
+    watcher.stop()
+
+
+def test_health_watcher_timeout(mock_process, monkeypatch):
+    watcher = _start_watcher(monkeypatch, FakeLineStream(keep_open=True))
+    mock_process.responses.append(process.Result(0, _health_json("starting"), ""))
+    assert watcher.wait("abc123", timeout=0.01) is None
+    watcher.stop()
+
+
+def test_health_watcher_stream_ended(mock_process, monkeypatch):
+    watcher = _start_watcher(monkeypatch, FakeLineStream())
+    watcher.stop()
+    mock_process.responses.append(process.Result(0, _health_json("starting"), ""))
+    assert watcher.wait("abc123", timeout=10) is None
+
+
+def test_health_watcher_subscribes_once(mock_process):
+    watcher = HealthWatcher()
+    watcher.start()
+    watcher.stop()
+    kind, args, _, _ = mock_process.calls[0]
+    assert kind == "open_lines"
+    assert args[:2] == ["docker", "events"]
+    assert "event=health_status" in args
+
+
 def test_stop_container(mock_process):
     mock_process.responses.append(process.Result(0, "", ""))
     assert stop_container("abc123", timeout=60) is True
@@ -100,3 +210,20 @@ def test_remove_container(mock_process):
     assert remove_container("abc123") is True
     _, args, _, _ = mock_process.calls[0]
     assert args == ["docker", "rm", "abc123"]
+
+
+def test_identify_old_new_registry_port():
+    old = {"ID": "old1", "Image": "registry:5000/app:v1", "CreatedAt": "2024-01-02 00:00:00"}
+    new = {"ID": "new1", "Image": "registry:5000/app:v2", "CreatedAt": "2024-01-01 00:00:00"}
+    o, n = identify_old_new([new, old], "v2")
+    assert o["ID"] == "old1"
+    assert n["ID"] == "new1"
+
+
+def test_stop_and_remove(mock_process):
+    mock_process.responses.extend([process.Result(0, "", ""), process.Result(0, "", "")])
+    assert stop_and_remove("abc123", timeout=45) is True
+    assert [args for _, args, _, _ in mock_process.calls] == [
+        ["docker", "stop", "--time", "45", "abc123"],
+        ["docker", "rm", "abc123"],
+    ]
@@ -1,9 +1,15 @@
 """Tests for deploy.py — full deploy lifecycle, rollback, dry-run."""
 
-import json
+import threading
+import time
 
-from flow_deploy import process
-from flow_deploy.deploy import deploy, rollback
+import pytest
+import yaml
+
+from flow_deploy import containers
+from flow_deploy import deploy as deploy_module
+from flow_deploy import lock, process, tags
+from flow_deploy.deploy import _wait_for_healthy, deploy, rollback
 
 COMPOSE_CMD = ["docker", "compose"]
 
@@ -28,39 +34,78 @@ services:
       deploy.role: accessory
 """
 
-WEB_CONTAINER_OLD = json.dumps(
-    {
-        "ID": "old_web_111",
-        "Image": "ghcr.io/myorg/myapp:oldtag",
-        "CreatedAt": "2024-01-01 00:00:00",
-        "State": "running",
-    }
+SINGLE_SVC_CONFIG_YAML = """\
+services:
+  web:
+    image: app:latest
+    labels:
+      deploy.role: app
+    healthcheck:
+      test: ["CMD", "true"]
+"""
+
+NO_HEALTHCHECK_CONFIG_YAML = """\
+services:
+  web:
+    image: app:latest
+    labels:
+      deploy.role: app
+"""
+
+NO_SERVICES_CONFIG_YAML = "services:\n  redis:\n    image: redis:7\n"
+
+# Parsed once at import; tests hand these straight to compose_config
+COMPOSE_CFG = yaml.safe_load(COMPOSE_CONFIG_YAML)
+SINGLE_SVC_CFG = yaml.safe_load(SINGLE_SVC_CONFIG_YAML)
+NO_HEALTHCHECK_CFG = yaml.safe_load(NO_HEALTHCHECK_CONFIG_YAML)
+NO_SERVICES_CFG = yaml.safe_load(NO_SERVICES_CONFIG_YAML)
+
+WEB_CONTAINER_OLD = (
+    '{"ID": "old_web_111", "Image": "ghcr.io/myorg/myapp:oldtag", '
+    '"CreatedAt": "2024-01-01 00:00:00", "State": "running"}'
 )
-WEB_CONTAINER_NEW = json.dumps(
-    {
-        "ID": "new_web_222",
-        "Image": "ghcr.io/myorg/myapp:abc123",
-        "CreatedAt": "2024-01-02 00:00:00",
-        "State": "running",
-    }
+WEB_CONTAINER_NEW = (
+    '{"ID": "new_web_222", "Image": "ghcr.io/myorg/myapp:abc123", '
+    '"CreatedAt": "2024-01-02 00:00:00", "State": "running"}'
 )
-WORKER_CONTAINER_OLD = json.dumps(
-    {
-        "ID": "old_wrk_333",
-        "Image": "ghcr.io/myorg/myapp:oldtag",
-        "CreatedAt": "2024-01-01 00:00:00",
-        "State": "running",
-    }
+WORKER_CONTAINER_OLD = (
+    '{"ID": "old_wrk_333", "Image": "ghcr.io/myorg/myapp:oldtag", '
+    '"CreatedAt": "2024-01-01 00:00:00", "State": "running"}'
 )
-WORKER_CONTAINER_NEW = json.dumps(
-    {
-        "ID": "new_wrk_444",
-        "Image": "ghcr.io/myorg/myapp:abc123",
-        "CreatedAt": "2024-01-02 00:00:00",
-        "State": "running",
-    }
+WORKER_CONTAINER_NEW = (
+    '{"ID": "new_wrk_444", "Image": "ghcr.io/myorg/myapp:abc123", '
+    '"CreatedAt": "2024-01-02 00:00:00", "State": "running"}'
 )
 
+# docker ps output once the service is scaled to two containers
+WEB_PS_OUTPUT = WEB_CONTAINER_OLD + "\n" + WEB_CONTAINER_NEW + "\n"
+WORKER_PS_OUTPUT = WORKER_CONTAINER_OLD + "\n" + WORKER_CONTAINER_NEW + "\n"
+
+HEALTHY = '{"Status": "healthy", "FailingStreak": 0, "Log": []}\n'
+STARTING = '{"Status": "starting", "FailingStreak": 0, "Log": []}\n'
+
+
+@pytest.fixture
+def deploy_tmp(tmp_path_factory):
+    """Empty working directory for a deploy run, numbered under one session base."""
+    return tmp_path_factory.mktemp("deploy")
+
+
+@pytest.fixture(autouse=True)
+def _chdir_tmp(monkeypatch, deploy_tmp):
+    monkeypatch.chdir(deploy_tmp)
+    return deploy_tmp
+
+
+def _use_config(monkeypatch, compose_dict):
+    """Make compose_config return *compose_dict* without going through process.run."""
+    monkeypatch.setattr("flow_deploy.compose.compose_config", lambda *a, **kw: compose_dict)
+
+
+@pytest.fixture
+def stub_compose_config(monkeypatch):
+    _use_config(monkeypatch, COMPOSE_CFG)
+
 
 def _ok(stdout=""):
     return process.Result(0, stdout, "")
@@ -70,65 +115,56 @@ def _err(stderr="error"):
     return process.Result(1, "", stderr)
 
 
-def _setup_happy_path(mock_process, monkeypatch, tmp_path):
+OK_EMPTY = _ok()
+WEB_PS_RESULT = _ok(WEB_PS_OUTPUT)
+WORKER_PS_RESULT = _ok(WORKER_PS_OUTPUT)
+HEALTHY_RESULT = _ok(HEALTHY)
+
+# Results are frozen, so every happy-path test can share the same instances
+HAPPY_PATH_RESPONSES = (
+    # web + worker: pull (concurrent)
+    OK_EMPTY,
+    OK_EMPTY,
+    # web: scale to 2, docker ps, health check, stop old, rm old, scale back to 1
+    OK_EMPTY,
+    WEB_PS_RESULT,
+    HEALTHY_RESULT,
+    OK_EMPTY,
+    OK_EMPTY,
+    OK_EMPTY,
+    # worker: same sequence
+    OK_EMPTY,
+    WORKER_PS_RESULT,
+    HEALTHY_RESULT,
+    OK_EMPTY,
+    OK_EMPTY,
+    OK_EMPTY,
+)
+
+
+def _setup_happy_path(mock_process):
     """Set up mock responses for a successful 2-service deploy."""
-    monkeypatch.chdir(tmp_path)
-    mock_process.responses.extend(
-        [
-            # compose config
-            _ok(COMPOSE_CONFIG_YAML),
-            # web: pull
-            _ok(),
-            # web: scale to 2
-            _ok(),
-            # web: docker ps (get containers)
-            _ok(WEB_CONTAINER_OLD + "\n" + WEB_CONTAINER_NEW + "\n"),
-            # web: health check (healthy)
-            _ok("healthy\n"),
-            # web: docker stop old
-            _ok(),
-            # web: docker rm old
-            _ok(),
-            # web: scale back to 1
-            _ok(),
-            # worker: pull
-            _ok(),
-            # worker: scale to 2
-            _ok(),
-            # worker: docker ps
-            _ok(WORKER_CONTAINER_OLD + "\n" + WORKER_CONTAINER_NEW + "\n"),
-            # worker: health check (healthy)
-            _ok("healthy\n"),
-            # worker: docker stop old
-            _ok(),
-            # worker: docker rm old
-            _ok(),
-            # worker: scale back to 1
-            _ok(),
-        ]
-    )
+    mock_process.responses.extend(HAPPY_PATH_RESPONSES)
 
 
-def test_deploy_happy_path(mock_process, monkeypatch, tmp_path):
-    _setup_happy_path(mock_process, monkeypatch, tmp_path)
+def test_deploy_happy_path(mock_process, stub_compose_config, deploy_tmp):
+    _setup_happy_path(mock_process)
     result = deploy(tag="abc123", cmd=COMPOSE_CMD)
     assert result == 0
     # Verify tag was written
-    tag_file = tmp_path / ".deploy-tag"
+    tag_file = deploy_tmp / ".deploy-tag"
     assert tag_file.exists()
     assert "abc123" in tag_file.read_text()
 
 
-def test_deploy_service_filter(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
+def test_deploy_service_filter(mock_process, stub_compose_config):
     mock_process.responses.extend(
         [
-            _ok(COMPOSE_CONFIG_YAML),
             # web only: pull, scale, ps, health, stop, rm, scale back
             _ok(),
             _ok(),
-            _ok(WEB_CONTAINER_OLD + "\n" + WEB_CONTAINER_NEW + "\n"),
-            _ok("healthy\n"),
+            _ok(WEB_PS_OUTPUT),
+            _ok(HEALTHY),
             _ok(),
             _ok(),
             _ok(),
@@ -138,9 +174,7 @@ def test_deploy_service_filter(mock_process, monkeypatch, tmp_path):
     assert result == 0
 
 
-def test_deploy_dry_run(mock_process, monkeypatch, tmp_path, capsys):
-    monkeypatch.chdir(tmp_path)
-    mock_process.responses.append(_ok(COMPOSE_CONFIG_YAML))
+def test_deploy_dry_run(mock_process, stub_compose_config, deploy_tmp, capsys):
     result = deploy(tag="abc123", dry_run=True, cmd=COMPOSE_CMD)
     assert result == 0
     out = capsys.readouterr().out
@@ -148,22 +182,21 @@ def test_deploy_dry_run(mock_process, monkeypatch, tmp_path, capsys):
     assert "web" in out
     assert "worker" in out
     # No lock file should exist
-    assert not (tmp_path / ".deploy-lock").exists()
+    assert not (deploy_tmp / ".deploy-lock").exists()
 
 
-def test_deploy_health_check_failure(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
+def test_deploy_health_check_failure(mock_process, stub_compose_config, monkeypatch):
     # Patch _wait_for_healthy to avoid real sleep
     monkeypatch.setattr("flow_deploy.deploy._wait_for_healthy", lambda *a, **kw: False)
     mock_process.responses.extend(
         [
-            _ok(COMPOSE_CONFIG_YAML),
-            # web: pull
+            # web + worker: pull (concurrent)
+            _ok(),
             _ok(),
             # web: scale to 2
             _ok(),
             # web: docker ps
-            _ok(WEB_CONTAINER_OLD + "\n" + WEB_CONTAINER_NEW + "\n"),
+            _ok(WEB_PS_OUTPUT),
             # web: stop new (rollback)
             _ok(),
             # web: rm new
@@ -174,77 +207,86 @@ def test_deploy_health_check_failure(mock_process, monkeypatch, tmp_path):
     )
     result = deploy(tag="abc123", cmd=COMPOSE_CMD)
     assert result == 1
+    # The rollback removes the new container, not the old one
+    removals = [args for _, args, _, _ in mock_process.calls if args[1] in ("stop", "rm")]
+    assert removals == [
+        ["docker", "stop", "--time", "30", "new_web_222"],
+        ["docker", "rm", "new_web_222"],
+    ]
 
 
-def test_deploy_pull_failure(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
-    mock_process.responses.extend(
-        [
-            _ok(COMPOSE_CONFIG_YAML),
-            _err("pull failed"),
-        ]
-    )
+def test_deploy_pull_failure(mock_process, stub_compose_config):
+    mock_process.responses.append(_err("pull failed"))
     result = deploy(tag="abc123", cmd=COMPOSE_CMD)
     assert result == 1
+    # Pull failures abort before any service is scaled up
+    assert not any("up" in args for _, args, _, _ in mock_process.calls)
 
 
-def test_deploy_lock_held(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
-    mock_process.responses.append(_ok(COMPOSE_CONFIG_YAML))
-    # Pre-acquire lock with current PID
-    from flow_deploy import lock
+def test_deploy_pulls_all_before_cutover(mock_process, stub_compose_config):
+    _setup_happy_path(mock_process)
+    deploy(tag="abc123", cmd=COMPOSE_CMD)
+    subcommands = [args[2] for _, args, _, _ in mock_process.calls if args[:2] == COMPOSE_CMD]
+    assert subcommands[:3] == ["pull", "pull", "up"]
 
-    lock.acquire()
-    try:
-        result = deploy(tag="abc123", cmd=COMPOSE_CMD)
-        assert result == 2
-    finally:
-        lock.release()
 
+def test_deploy_abort_during_pull_waits_for_running_pulls(
+    monkeypatch, mock_process, stub_compose_config
+):
+    started = threading.Event()
+    locked_while_pulling = []
 
-def test_deploy_missing_healthcheck(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
-    config_no_hc = """\
-services:
-  web:
-    image: app:latest
-    labels:
-      deploy.role: app
-"""
-    mock_process.responses.append(_ok(config_no_hc))
+    def fake_pull(svc, tag, compose_cmd):
+        # web aborts (as the SIGTERM handler would) while worker's pull is still running
+        if svc.name == "web":
+            started.wait(5)
+            raise SystemExit(1)
+        started.set()
+        time.sleep(0.1)
+        locked_while_pulling.append(lock.read_lock() is not None)
+        return 0
+
+    monkeypatch.setattr(deploy_module, "_pull", fake_pull)
+    with pytest.raises(SystemExit):
+        deploy(tag="abc123", cmd=COMPOSE_CMD)
+    assert locked_while_pulling == [True]
+    assert lock.read_lock() is None
+
+
+@pytest.fixture
+def acquired_lock(_chdir_tmp):
+    """Hold the deploy lock (as this PID) in the test's working directory."""
+    assert lock.acquire() is True
+    yield
+    lock.release()
+
+
+def test_deploy_lock_held(mock_process, stub_compose_config, acquired_lock):
+    assert deploy(tag="abc123", cmd=COMPOSE_CMD) == 2
+
+
+def test_deploy_missing_healthcheck(mock_process, monkeypatch):
+    _use_config(monkeypatch, NO_HEALTHCHECK_CFG)
     result = deploy(tag="abc123", cmd=COMPOSE_CMD)
     assert result == 1
 
 
-def test_deploy_no_services(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
-    config_empty = "services:\n  redis:\n    image: redis:7\n"
-    mock_process.responses.append(_ok(config_empty))
+def test_deploy_no_services(mock_process, monkeypatch):
+    _use_config(monkeypatch, NO_SERVICES_CFG)
     result = deploy(tag="abc123", cmd=COMPOSE_CMD)
     assert result == 1
 
 
-def test_deploy_compose_config_failure(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
+def test_deploy_compose_config_failure(mock_process):
     mock_process.responses.append(_err("compose error"))
     result = deploy(tag="abc123", cmd=COMPOSE_CMD)
     assert result == 1
 
 
-def test_deploy_container_count_mismatch(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
-    single_svc_config = """\
-services:
-  web:
-    image: app:latest
-    labels:
-      deploy.role: app
-    healthcheck:
-      test: ["CMD", "true"]
-"""
+def test_deploy_container_count_mismatch(mock_process, monkeypatch):
+    _use_config(monkeypatch, SINGLE_SVC_CFG)
     mock_process.responses.extend(
         [
-            _ok(single_svc_config),
             _ok(),  # pull
             _ok(),  # scale to 2
             _ok(WEB_CONTAINER_OLD + "\n"),  # only 1 container returned
@@ -255,41 +297,48 @@ services:
     assert result == 1
 
 
-def test_deploy_order(mock_process, monkeypatch, tmp_path, capsys):
+def test_deploy_order(mock_process, stub_compose_config, capsys):
     """Verify services deploy in order (web before worker due to deploy.order)."""
-    _setup_happy_path(mock_process, monkeypatch, tmp_path)
+    _setup_happy_path(mock_process)
     deploy(tag="abc123", cmd=COMPOSE_CMD)
     out = capsys.readouterr().out
-    web_pos = out.index("▸ web")
-    worker_pos = out.index("▸ worker")
-    assert web_pos < worker_pos
+    positions = {name: out.find(f"▸ {name}") for name in ("web", "worker")}
+    assert 0 <= positions["web"] < positions["worker"]
+
+
+def test_wait_for_healthy_falls_back_to_polling(mock_process, monkeypatch):
+    watcher = containers.HealthWatcher()  # never started, so wait() returns None at once
+    monkeypatch.setattr("flow_deploy.deploy.time.sleep", lambda s: None)
+    mock_process.responses.extend([_ok(STARTING), _ok(STARTING), _ok(HEALTHY)])
+    assert _wait_for_healthy("abc123", timeout=10, poll_interval=1, watcher=watcher) is True
+    assert len(mock_process.calls) == 3
+
+
+def test_wait_for_healthy_stops_at_failing_streak(mock_process, monkeypatch):
+    watcher = containers.HealthWatcher()
+    monkeypatch.setattr("flow_deploy.deploy.time.sleep", lambda s: None)
+    failing = '{"Status": "starting", "FailingStreak": 2, "Log": []}'
+    mock_process.responses.extend([_ok(STARTING), _ok(STARTING), _ok(failing)])
+    assert (
+        _wait_for_healthy("abc123", timeout=10, poll_interval=1, watcher=watcher, retries=2)
+        is False
+    )
+    assert len(mock_process.calls) == 3
 
 
-def test_rollback(mock_process, monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
+def test_rollback(mock_process, monkeypatch):
     # Write tag history
-    from flow_deploy import tags
-
     tags.write_tag("v1")
     tags.write_tag("v2")
 
     # Setup deploy responses for rollback to v1
-    single_svc_config = """\
-services:
-  web:
-    image: app:latest
-    labels:
-      deploy.role: app
-    healthcheck:
-      test: ["CMD", "true"]
-"""
+    _use_config(monkeypatch, SINGLE_SVC_CFG)
     mock_process.responses.extend(
         [
-            _ok(single_svc_config),
             _ok(),
             _ok(),
-            _ok(WEB_CONTAINER_OLD + "\n" + WEB_CONTAINER_NEW + "\n"),
-            _ok("healthy\n"),
+            _ok(WEB_PS_OUTPUT),
+            _ok(HEALTHY),
             _ok(),
             _ok(),
             _ok(),
@@ -299,7 +348,6 @@ services:
     assert result == 0
 
 
-def test_rollback_no_previous(monkeypatch, tmp_path):
-    monkeypatch.chdir(tmp_path)
+def test_rollback_no_previous():
     result = rollback(cmd=COMPOSE_CMD)
     assert result == 1
@@ -1,10 +1,8 @@
 """Tests for discover_hosts — host grouping and env-var overrides."""
 
-import sys
+import copy
 
-sys.path.insert(0, ".github/actions/deploy")
-
-from discover_hosts import _env_overrides, discover_hosts  # noqa: E402
+from discover_hosts import _env_overrides, discover_hosts
 
 
 def _compose(x_deploy=None, **services):
@@ -31,12 +29,21 @@ def _app_svc(host=None, user=None, dir_=None):
     return svc
 
 
+# discover_hosts only reads its input, so tests share these prebuilt configs
+SINGLE_HOST = _compose(
+    x_deploy={"host": "h1", "user": "deploy", "dir": "/srv/app"},
+    web=_app_svc(),
+)
+TWO_HOSTS = _compose(
+    x_deploy={"user": "deploy", "dir": "/srv/app"},
+    web=_app_svc(host="h1"),
+    worker=_app_svc(host="h2"),
+)
+NO_HOST = _compose(web=_app_svc())
+
+
 def test_basic_grouping():
-    d = _compose(
-        x_deploy={"host": "h1", "user": "deploy", "dir": "/srv/app"},
-        web=_app_svc(),
-    )
-    groups = discover_hosts(d)
+    groups = discover_hosts(SINGLE_HOST)
     assert len(groups) == 1
     assert groups[0]["host"] == "h1"
     assert groups[0]["user"] == "deploy"
@@ -44,61 +51,45 @@ def test_basic_grouping():
 
 
 def test_override_host():
-    d = _compose(
-        x_deploy={"host": "h1", "user": "deploy", "dir": "/srv/app"},
-        web=_app_svc(),
-    )
-    groups = discover_hosts(d, overrides={"host": "secret-host"})
+    groups = discover_hosts(SINGLE_HOST, overrides={"host": "secret-host"})
     assert groups[0]["host"] == "secret-host"
     assert groups[0]["user"] == "deploy"
 
 
 def test_override_user():
-    d = _compose(
-        x_deploy={"host": "h1", "user": "deploy", "dir": "/srv/app"},
-        web=_app_svc(),
-    )
-    groups = discover_hosts(d, overrides={"user": "secret-user"})
+    groups = discover_hosts(SINGLE_HOST, overrides={"user": "secret-user"})
     assert groups[0]["host"] == "h1"
     assert groups[0]["user"] == "secret-user"
 
 
 def test_override_both():
-    d = _compose(
-        x_deploy={"host": "h1", "user": "deploy", "dir": "/srv/app"},
-        web=_app_svc(),
-    )
-    groups = discover_hosts(d, overrides={"host": "secret-host", "user": "secret-user"})
+    groups = discover_hosts(SINGLE_HOST, overrides={"host": "secret-host", "user": "secret-user"})
     assert groups[0]["host"] == "secret-host"
     assert groups[0]["user"] == "secret-user"
 
 
 def test_override_collapses_groups():
     """Two services on different hosts collapse into one group when host is overridden."""
-    d = _compose(
-        x_deploy={"user": "deploy", "dir": "/srv/app"},
-        web=_app_svc(host="h1"),
-        worker=_app_svc(host="h2"),
-    )
-    groups = discover_hosts(d, overrides={"host": "single-host"})
+    groups = discover_hosts(TWO_HOSTS, overrides={"host": "single-host"})
     assert len(groups) == 1
     assert groups[0]["host"] == "single-host"
     assert sorted(groups[0]["services"]) == ["web", "worker"]
 
 
+def test_input_not_mutated():
+    before = copy.deepcopy(TWO_HOSTS)
+    discover_hosts(TWO_HOSTS, overrides={"host": "single-host", "user": "other"})
+    assert TWO_HOSTS == before
+
+
 def test_override_supplies_missing_host():
     """Override can provide host when x-deploy and labels are missing."""
-    d = _compose(web=_app_svc())
-    groups = discover_hosts(d, overrides={"host": "supplied-host"})
+    groups = discover_hosts(NO_HOST, overrides={"host": "supplied-host"})
     assert groups[0]["host"] == "supplied-host"
 
 
 def test_no_overrides_passes_through():
-    d = _compose(
-        x_deploy={"host": "h1", "user": "deploy", "dir": "/srv/app"},
-        web=_app_svc(),
-    )
-    groups = discover_hosts(d, overrides={})
+    groups = discover_hosts(SINGLE_HOST, overrides={})
     assert groups[0]["host"] == "h1"
     assert groups[0]["user"] == "deploy"
 
@@ -119,3 +110,16 @@ def test_env_overrides_partial(monkeypatch):
     monkeypatch.setenv("HOST_NAME", "env-host")
     monkeypatch.delenv("HOST_USER", raising=False)
     assert _env_overrides() == {"host": "env-host"}
+
+
+def test_groups_keep_deploy_order():
+    """Groups are emitted in deploy order, not sorted by host."""
+    d = _compose(
+        x_deploy={"user": "deploy", "dir": "/srv/app"},
+        web=_app_svc(host="z-host"),
+        worker=_app_svc(host="a-host"),
+        api=_app_svc(host="z-host"),
+    )
+    groups = discover_hosts(d)
+    assert [g["host"] for g in groups] == ["z-host", "a-host"]
+    assert groups[0]["services"] == ["web", "api"]
@@ -0,0 +1,33 @@
+"""Tests for jsonio.py — orjson/stdlib JSON shim."""
+
+import importlib
+import sys
+
+import pytest
+
+from flow_deploy import jsonio
+
+
+def test_round_trip():
+    data = {"pid": 123, "hosts": ["a", "b"]}
+    encoded = jsonio.dumps(data)
+    assert isinstance(encoded, bytes)
+    assert jsonio.loads(encoded) == data
+    assert jsonio.loads(encoded.decode()) == data
+
+
+def test_decode_error():
+    with pytest.raises(jsonio.JSONDecodeError):
+        jsonio.loads("not json")
+
+
+def test_stdlib_fallback(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    try:
+        fallback = importlib.reload(jsonio)
+        assert fallback.dumps({"a": 1}) == b'{"a": 1}'
+        with pytest.raises(fallback.JSONDecodeError):
+            fallback.loads("not json")
+    finally:
+        monkeypatch.undo()
+        importlib.reload(jsonio)
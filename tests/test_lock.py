@@ -2,12 +2,23 @@
 
 import json
 import os
+import time
 
-from flow_deploy.lock import acquire, read_lock, release
+import pytest
 
+from flow_deploy import lock
+from flow_deploy.lock import LOCK_FILE, acquire, read_lock, release
 
-def test_acquire_and_release(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+
+def _write_old_lock(lock_dir, text):
+    """Write a lock file last modified well outside the corrupt-lock grace period."""
+    path = lock_dir / LOCK_FILE
+    path.write_text(text)
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+
+def test_acquire_and_release(isolated_lock_dir):
     assert acquire() is True
     lock = read_lock()
     assert lock is not None
@@ -17,18 +28,20 @@ def test_acquire_and_release(tmp_path, monkeypatch):
     assert read_lock() is None
 
 
-def test_acquire_fails_when_held(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
-    # Write a lock with current PID (which is running)
-    assert acquire() is True
+@pytest.fixture
+def held_lock(isolated_lock_dir):
+    """A lock file owned by this (running) process, written directly."""
+    (isolated_lock_dir / LOCK_FILE).write_text(json.dumps({"pid": os.getpid(), "timestamp": 0}))
+
+
+def test_acquire_fails_when_held(held_lock):
     assert acquire() is False
-    release()
+    assert read_lock()["timestamp"] == 0  # live lock left untouched
 
 
-def test_stale_lock_broken(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_stale_lock_broken(isolated_lock_dir):
     # Write a lock with a PID that doesn't exist
-    with open(tmp_path / ".deploy-lock", "w") as f:
+    with open(isolated_lock_dir / ".deploy-lock", "w") as f:
         json.dump({"pid": 999999999, "timestamp": 0}, f)
     assert acquire() is True
     lock = read_lock()
@@ -36,19 +49,54 @@ def test_stale_lock_broken(tmp_path, monkeypatch):
     release()
 
 
-def test_corrupt_lock_overwritten(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
-    with open(tmp_path / ".deploy-lock", "w") as f:
-        f.write("not json")
+def test_corrupt_lock_overwritten(isolated_lock_dir):
+    _write_old_lock(isolated_lock_dir, "not json")
     assert acquire() is True
     release()
 
 
-def test_release_no_file(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_fresh_corrupt_lock_not_broken(isolated_lock_dir):
+    # An empty lock may be another writer mid-write; leave it alone for now
+    (isolated_lock_dir / LOCK_FILE).write_text("")
+    assert acquire() is False
+    assert (isolated_lock_dir / LOCK_FILE).read_text() == ""
+
+
+def test_acquire_leaves_no_temp_files(isolated_lock_dir):
+    _write_old_lock(isolated_lock_dir, json.dumps({"pid": 999999999, "timestamp": 0}))
+    assert acquire() is True
+    assert sorted(p.name for p in isolated_lock_dir.iterdir()) == [LOCK_FILE]
+    release()
+
+
+def test_stale_lock_taken_by_another_breaker(isolated_lock_dir, monkeypatch):
+    """If another process breaks the stale lock and takes it first, its lock survives."""
+    path = isolated_lock_dir / LOCK_FILE
+    path.write_text(json.dumps({"pid": 999999999, "timestamp": 0}))
+    winner = json.dumps({"pid": 4242, "timestamp": 1})
+
+    def other_process_wins(pid):
+        # Between our read and our break, the other process replaces the lock
+        path.unlink()
+        path.write_text(winner)
+        return False
+
+    monkeypatch.setattr(lock, "_is_pid_running", other_process_wins)
+    assert acquire() is False
+    assert path.read_text() == winner
+    assert sorted(p.name for p in isolated_lock_dir.iterdir()) == [LOCK_FILE]
+
+
+def test_release_no_file(isolated_lock_dir):
     release()  # Should not raise
 
 
-def test_read_lock_no_file(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_read_lock_no_file(isolated_lock_dir):
     assert read_lock() is None
+
+
+def test_lock_missing_pid_overwritten(isolated_lock_dir):
+    _write_old_lock(isolated_lock_dir, json.dumps({"timestamp": 0}))
+    assert acquire() is True
+    assert read_lock()["pid"] == os.getpid()
+    release()
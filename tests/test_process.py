@@ -1,6 +1,16 @@
 """Tests for process.py — subprocess wrapper."""
 
-from flow_deploy.process import Result, run, run_streaming
+import subprocess
+
+from flow_deploy.process import Result, _merged_env, open_lines, run, run_lines, run_streaming
+from tests.helpers import Recorder
+
+
+def _fake_subprocess_run(monkeypatch, returncode=0, stdout="", stderr=""):
+    """Replace subprocess.run with a recorder returning a canned CompletedProcess."""
+    rec = Recorder(subprocess.CompletedProcess([], returncode, stdout, stderr))
+    monkeypatch.setattr("flow_deploy.process.subprocess.run", rec)
+    return rec
 
 
 def test_result_dataclass():
@@ -17,26 +27,70 @@ def test_run_captures_output():
     assert result.stderr == ""
 
 
-def test_run_captures_stderr():
-    result = run(["sh", "-c", "echo err >&2"])
-    assert result.stderr.strip() == "err"
+def test_run_captures_stderr(monkeypatch):
+    rec = _fake_subprocess_run(monkeypatch, stderr="err\n")
+    result = run(["cmd", "arg"])
+    assert result == Result(returncode=0, stdout="", stderr="err\n")
+    assert rec.call_args == (["cmd", "arg"],)
+    assert rec.calls[0][1]["capture_output"] is True
+    assert rec.calls[0][1]["text"] is True
 
 
-def test_run_returns_nonzero():
-    result = run(["sh", "-c", "exit 42"])
+def test_run_returns_nonzero(monkeypatch):
+    rec = _fake_subprocess_run(monkeypatch, returncode=42)
+    result = run(["cmd"])
     assert result.returncode == 42
+    assert rec.calls[0][1]["capture_output"] is True
+    assert rec.calls[0][1]["text"] is True
+
+
+def test_run_with_env(monkeypatch):
+    rec = _fake_subprocess_run(monkeypatch)
+    run(["cmd"], env={"TEST_VAR": "works"}, cwd="/srv")
+    env = rec.calls[0][1]["env"]
+    assert env["TEST_VAR"] == "works"
+    assert "PATH" in env
+    assert rec.calls[0][1]["cwd"] == "/srv"
+
+
+def test_merged_env_reused():
+    first = _merged_env({"TEST_VAR": "works", "OTHER": "1"})
+    second = _merged_env({"OTHER": "1", "TEST_VAR": "works"})
+    assert first is second
+    assert first["TEST_VAR"] == "works"
+    assert "PATH" in first
+
+
+def test_merged_env_none():
+    assert _merged_env(None) is None
+
+
+def test_run_streaming_returns_exit_code(monkeypatch):
+    rec = _fake_subprocess_run(monkeypatch)
+    assert run_streaming(["true"]) == 0
+    # Output passes straight through rather than being captured
+    assert "capture_output" not in rec.calls[0][1]
+
+
+def test_run_streaming_nonzero(monkeypatch):
+    _fake_subprocess_run(monkeypatch, returncode=1)
+    assert run_streaming(["false"]) == 1
 
 
-def test_run_with_env():
-    result = run(["sh", "-c", "echo $TEST_VAR"], env={"TEST_VAR": "works"})
-    assert result.stdout.strip() == "works"
+def test_run_lines_yields_lines():
+    lines = list(run_lines(["sh", "-c", "echo one; echo two"]))
+    assert lines == ["one\n", "two\n"]
 
 
-def test_run_streaming_returns_exit_code():
-    code = run_streaming(["true"])
-    assert code == 0
+def test_run_lines_early_exit_kills_process():
+    lines = run_lines(["sh", "-c", "echo first; sleep 30"])
+    assert next(lines) == "first\n"
+    lines.close()  # Should not block for 30s
 
 
-def test_run_streaming_nonzero():
-    code = run_streaming(["false"])
-    assert code != 0
+def test_open_lines_close_ends_iteration():
+    stream = open_lines(["sh", "-c", "echo first; exec sleep 30"])
+    lines = iter(stream)
+    assert next(lines) == "first\n"
+    stream.close()
+    assert list(lines) == []
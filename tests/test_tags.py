@@ -1,22 +1,19 @@
 """Tests for tags.py — deploy tag history."""
 
-from flow_deploy.tags import current_tag, previous_tag, read_tags, write_tag
+from flow_deploy.tags import TAG_FILE, current_tag, previous_tag, read_tags, tail_tags, write_tag
 
 
-def test_read_empty(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_read_empty(isolated_lock_dir):
     assert read_tags() == []
 
 
-def test_write_and_read(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_write_and_read(isolated_lock_dir):
     write_tag("abc123")
     assert read_tags() == ["abc123"]
     assert current_tag() == "abc123"
 
 
-def test_multiple_tags(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_multiple_tags(isolated_lock_dir):
     write_tag("v1")
     write_tag("v2")
     write_tag("v3")
@@ -25,27 +22,41 @@ def test_multiple_tags(tmp_path, monkeypatch):
     assert previous_tag() == "v2"
 
 
-def test_max_history(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
-    for i in range(15):
-        write_tag(f"tag-{i}")
+def test_max_history(isolated_lock_dir):
+    # Seed an over-long history, then let one write_tag trim it
+    (isolated_lock_dir / TAG_FILE).write_text("".join(f"tag-{i}\n" for i in range(14)))
+    write_tag("tag-14")
     tags = read_tags()
     assert len(tags) == 10
     assert tags[0] == "tag-5"
     assert tags[-1] == "tag-14"
 
 
-def test_current_tag_none(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_current_tag_none(isolated_lock_dir):
     assert current_tag() is None
 
 
-def test_previous_tag_none(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_previous_tag_none(isolated_lock_dir):
     assert previous_tag() is None
 
 
-def test_previous_tag_single(tmp_path, monkeypatch):
-    monkeypatch.chdir(tmp_path)
+def test_previous_tag_single(isolated_lock_dir):
     write_tag("only-one")
     assert previous_tag() is None
+
+
+def test_tail_tags(isolated_lock_dir):
+    assert tail_tags(2) == []
+    write_tag("v1")
+    assert tail_tags(2) == ["v1"]
+    write_tag("v2")
+    write_tag("v3")
+    assert tail_tags(2) == ["v2", "v3"]
+
+
+def test_tail_tags_long_lines(isolated_lock_dir):
+    long_tags = [c * 600 for c in "abc"]
+    (isolated_lock_dir / TAG_FILE).write_text("\n".join(long_tags) + "\n")
+    assert tail_tags(1) == [long_tags[-1]]
+    assert tail_tags(2) == long_tags[-2:]
+    assert previous_tag() == long_tags[1]
@@ -1,30 +1,40 @@
 """Tests for upgrade.py — binary self-upgrade."""
 
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
+from click.testing import CliRunner
 
 from flow_deploy import upgrade
+from flow_deploy.cli import main
 
+_runner = CliRunner()
 
-def test_detect_libc_glibc():
-    """Default detection returns glibc."""
-    mock_result = MagicMock(stdout="linux-gnu", stderr="")
-    with patch("subprocess.run", return_value=mock_result):
-        assert upgrade._detect_libc() == "glibc"
 
+@pytest.fixture
+def mock_sp_run():
+    """Patch subprocess.run; defaults to glibc-style ldd output."""
+    with patch("subprocess.run") as m:
+        m.return_value = MagicMock(stdout="linux-gnu", stderr="", returncode=0)
+        yield m
 
-def test_detect_libc_musl():
-    """Detects musl from ldd output."""
-    mock_result = MagicMock(stdout="/lib/ld-musl-x86_64.so.1", stderr="")
-    with patch("subprocess.run", return_value=mock_result):
-        assert upgrade._detect_libc() == "musl"
 
-
-def test_detect_libc_no_ldd():
-    """Falls back to glibc when ldd is missing."""
-    with patch("subprocess.run", side_effect=FileNotFoundError):
-        assert upgrade._detect_libc() == "glibc"
+@pytest.mark.parametrize(
+    "ldd_stdout,side_effect,expected",
+    [
+        ("linux-gnu", None, "glibc"),
+        ("/lib/ld-musl-x86_64.so.1", None, "musl"),
+        # ldd missing falls back to glibc
+        (None, FileNotFoundError, "glibc"),
+    ],
+    ids=["glibc", "musl", "no_ldd"],
+)
+def test_detect_libc(mock_sp_run, ldd_stdout, side_effect, expected):
+    if ldd_stdout is not None:
+        mock_sp_run.return_value.stdout = ldd_stdout
+    mock_sp_run.side_effect = side_effect
+    assert upgrade._detect_libc() == expected
 
 
 def test_binary_path_pyinstaller():
@@ -49,30 +59,28 @@ def test_binary_path_not_found():
                 upgrade._binary_path()
 
 
-def test_download_curl(tmp_path):
+def test_download_curl(tmp_path, mock_sp_run):
     """Downloads using curl when available."""
     dest = str(tmp_path / "binary")
     with patch("shutil.which", return_value="/usr/bin/curl"):
-        with patch("subprocess.run") as mock_run:
-            upgrade._download("https://example.com/bin", dest)
-            mock_run.assert_called_once_with(
-                ["curl", "-fsSL", "-o", dest, "https://example.com/bin"],
-                check=True,
-                timeout=120,
-            )
+        upgrade._download("https://example.com/bin", dest)
+    mock_sp_run.assert_called_once_with(
+        ["curl", "-fsSL", "-o", dest, "https://example.com/bin"],
+        check=True,
+        timeout=120,
+    )
 
 
-def test_download_wget(tmp_path):
+def test_download_wget(tmp_path, mock_sp_run):
     """Falls back to wget when curl is missing."""
     dest = str(tmp_path / "binary")
     with patch("shutil.which", side_effect=lambda cmd: "/usr/bin/wget" if cmd == "wget" else None):
-        with patch("subprocess.run") as mock_run:
-            upgrade._download("https://example.com/bin", dest)
-            mock_run.assert_called_once_with(
-                ["wget", "-qO", dest, "https://example.com/bin"],
-                check=True,
-                timeout=120,
-            )
+        upgrade._download("https://example.com/bin", dest)
+    mock_sp_run.assert_called_once_with(
+        ["wget", "-qO", dest, "https://example.com/bin"],
+        check=True,
+        timeout=120,
+    )
 
 
 def test_download_no_tools():
@@ -91,13 +99,14 @@ def test_upgrade_success(mock_libc, mock_path, mock_dl, tmp_path):
     binary.write_text("old")
     mock_libc.return_value = "glibc"
     mock_path.return_value = str(binary)
-    mock_dl.side_effect = lambda url, dest: open(dest, "w").write("new")
+    mock_dl.side_effect = lambda url, dest: Path(dest).write_text("new")
 
     result = upgrade.upgrade()
 
     assert result == 0
     mock_dl.assert_called_once()
     assert "latest/download/flow-deploy-linux-glibc" in mock_dl.call_args[0][0]
+    assert binary.read_text() == "new"
 
 
 @patch("flow_deploy.upgrade._download", side_effect=RuntimeError("network error"))
@@ -128,16 +137,11 @@ def test_upgrade_no_binary(mock_path):
 @patch("flow_deploy.upgrade._detect_libc")
 def test_upgrade_cli(mock_libc, mock_path, mock_dl, tmp_path):
     """Upgrade command via CLI."""
-    from click.testing import CliRunner
-
-    from flow_deploy.cli import main
-
     binary = tmp_path / "flow-deploy"
     binary.write_text("old")
     mock_libc.return_value = "glibc"
     mock_path.return_value = str(binary)
-    mock_dl.side_effect = lambda url, dest: open(dest, "w").write("new")
+    mock_dl.side_effect = lambda url, dest: Path(dest).write_text("new")
 
-    runner = CliRunner()
-    result = runner.invoke(main, ["upgrade"])
+    result = _runner.invoke(main, ["upgrade"])
     assert result.exit_code == 0